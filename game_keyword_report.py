@@ -0,0 +1,135 @@
+#把监控工具发现的游戏名和Semrush导出的关键词关联起来，看哪些新游戏已经有搜索量
+
+import os
+import re
+import unicodedata
+
+import pandas as pd
+
+
+def normalize_keyword(text):
+    # 统一大小写和全半角，去掉标点，多个空格合并为一个
+    text = unicodedata.normalize('NFKC', str(text)).lower()
+    text = re.sub(r'[^\w]+', ' ', text)
+    return ' '.join(text.split())
+
+
+def trend_summary(trend):
+    # 根据12个月的Trend字符串判断趋势
+    try:
+        months = [float(v) for v in str(trend).split(',')]
+    except ValueError:
+        return ''
+    if len(months) != 12:
+        return ''
+    first_half = sum(months[:6])
+    second_half = sum(months[6:])
+    if first_half == 0 and second_half > 0:
+        return 'new'
+    if second_half > first_half:
+        return 'rising'
+    if second_half < first_half:
+        return 'falling'
+    return 'flat'
+
+
+class KeywordIndex:
+    def __init__(self):
+        # 完全匹配：规范化后的关键词 -> 记录
+        self.exact = {}
+        # 前缀匹配：关键词按词切分后的每个前缀 -> 搜索量最大的记录
+        # 例如 "foo game online" 会登记 "foo"、"foo game"、"foo game online"
+        self.prefix = {}
+
+    def add_export(self, file_path):
+        # 每个导出文件只读取一次，只读需要的三列
+        if os.path.splitext(file_path)[1].lower() == '.csv':
+            df = pd.read_csv(file_path, usecols=['Keyword', 'Volume', 'Trend'])
+        else:
+            df = pd.read_excel(file_path, usecols=['Keyword', 'Volume', 'Trend'])
+
+        export_name = os.path.basename(file_path)
+        for keyword, volume, trend in df.itertuples(index=False, name=None):
+            key = normalize_keyword(keyword)
+            if not key:
+                continue
+            volume = 0 if pd.isna(volume) else int(volume)
+            entry = {
+                'keyword': keyword,
+                'volume': volume,
+                'trend': trend_summary(trend),
+                'export': export_name
+            }
+
+            # 多个导出文件里有同一个词时，保留搜索量大的
+            if key not in self.exact or self.exact[key]['volume'] < volume:
+                self.exact[key] = entry
+
+            words = key.split(' ')
+            for i in range(1, len(words) + 1):
+                prefix = ' '.join(words[:i])
+                if prefix not in self.prefix or self.prefix[prefix]['volume'] < volume:
+                    self.prefix[prefix] = entry
+        return len(df)
+
+    def lookup(self, game_name):
+        # 先找完全匹配，再找以游戏名开头的关键词，每次都是一次字典查询
+        # 空的游戏名读进来是NaN，不能当成字符串"nan"去匹配
+        if pd.isna(game_name):
+            return None, ''
+        key = normalize_keyword(game_name)
+        if not key:
+            return None, ''
+        if key in self.exact:
+            return self.exact[key], 'exact'
+        if key in self.prefix:
+            return self.prefix[key], 'prefix'
+        return None, ''
+
+
+def load_monitor_results(file_path):
+    # 读取监控工具保存的结果文件
+    extension = os.path.splitext(file_path)[1].lower()
+    if extension == '.csv':
+        for encoding in ['utf-8-sig', 'utf-8', 'gbk', 'gb2312', 'gb18030']:
+            try:
+                return pd.read_csv(file_path, encoding=encoding)
+            except (UnicodeDecodeError, UnicodeError):
+                continue
+        raise ValueError(f"无法识别文件编码: {file_path}")
+    return pd.read_excel(file_path)
+
+
+def build_report(results_file, export_files, output_file='game_keyword_report.xlsx'):
+    # 建立索引
+    index = KeywordIndex()
+    for export_file in export_files:
+        count = index.add_export(export_file)
+        print(f"已加载 {export_file}: {count} 个关键词")
+
+    # 逐条查询新页面的游戏名
+    pages = load_monitor_results(results_file)
+    matches = [index.lookup(name) for name in pages['game_name']]
+    pages['matched_keyword'] = [entry['keyword'] if entry else None for entry, _ in matches]
+    pages['match_type'] = [match_type for _, match_type in matches]
+    pages['volume'] = [entry['volume'] if entry else None for entry, _ in matches]
+    pages['trend'] = [entry['trend'] if entry else None for entry, _ in matches]
+    pages['export'] = [entry['export'] if entry else None for entry, _ in matches]
+
+    # 有搜索量的排在前面
+    report = pages.sort_values('volume', ascending=False, na_position='last')
+    report.to_excel(output_file, index=False)
+    return report
+
+
+if __name__ == '__main__':
+    # 使用函数
+    results_file = 'newminotor.xlsx'  # 替换为监控工具的结果文件
+    export_files = ['Generator_broad-match_us_2024-09-16.xlsx']  # 替换为Semrush导出文件
+    report = build_report(results_file, export_files)
+
+    matched = report[report['matched_keyword'].notna()]
+    print(f"新页面数: {len(report)}")
+    print(f"有搜索量的页面数: {len(matched)}")
+    print("\n前10个:")
+    print(matched[['game_name', 'matched_keyword', 'volume', 'trend']].head(10))
@@ -0,0 +1,50 @@
+# 历史数据内存占用测试：比较默认object类型和HISTORY_SCHEMA在100万行数据上的内存占用
+# 用法: python bench_history_memory.py [行数]
+
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from main import apply_history_schema, TIMESTAMP_FORMAT
+
+
+def make_history(rows):
+    """生成模拟的历史数据，列和监控结果一致"""
+    rng = np.random.default_rng(0)
+    sites = np.array([f"site{i}.com" for i in range(500)], dtype=object)
+    games = np.array([f"Game {i}" for i in range(20000)], dtype=object)
+    ids = np.arange(rows)
+    base = pd.Timestamp('2024-01-01')
+    seconds = rng.integers(0, 365 * 24 * 3600, rows)
+    return pd.DataFrame({
+        'title': [f"Game {i % 20000} 攻略 第{i}期" for i in ids],
+        'url': [f"https://site{i % 500}.com/news/{i}.html" for i in ids],
+        'game_name': games[rng.integers(0, len(games), rows)],
+        'site': sites[rng.integers(0, len(sites), rows)],
+        'time_range': np.where(rng.random(rows) < 0.5, '24h', '1w').astype(object),
+        'timestamp': (base + pd.to_timedelta(seconds, unit='s')).strftime(TIMESTAMP_FORMAT)
+    })
+
+
+def memory_mb(df):
+    return df.memory_usage(deep=True).sum() / 1024 / 1024
+
+
+if __name__ == '__main__':
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+
+    df = make_history(rows)
+    before = memory_mb(df)
+
+    start = time.perf_counter()
+    df = apply_history_schema(df)
+    elapsed = time.perf_counter() - start
+    after = memory_mb(df)
+
+    print(f"行数: {rows}")
+    print(f"object类型: {before:.1f} MB")
+    print(f"紧凑类型:   {after:.1f} MB ({after / before:.0%})")
+    print(f"转换耗时:   {elapsed:.2f} s")
+    print(df.dtypes)
@@ -0,0 +1,48 @@
+# 启动时间测试：在新进程中导入main，超过时间预算或提前加载了重依赖时返回非0
+# 用法: python bench_startup.py [预算毫秒数]
+
+import os
+import subprocess
+import sys
+
+# 启动时不应该被导入的依赖，只有读写历史数据、发送请求、解析页面时才加载
+HEAVY_MODULES = ['pandas', 'numpy', 'pyarrow', 'requests', 'bs4', 'openpyxl', 'xlrd', 'schedule']
+RUNS = 5
+
+CHILD_CODE = '''
+import sys, time
+start = time.perf_counter()
+import main
+elapsed = time.perf_counter() - start
+loaded = [m for m in %r if m in sys.modules]
+print(elapsed * 1000)
+print(",".join(loaded))
+''' % (HEAVY_MODULES,)
+
+
+def measure():
+    """在新进程中导入一次main，返回 (耗时毫秒, 已加载的重依赖)"""
+    output = subprocess.run(
+        [sys.executable, '-c', CHILD_CODE],
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+        capture_output=True, text=True, check=True
+    ).stdout.splitlines()
+    return float(output[0]), [m for m in output[1].split(',') if m] if len(output) > 1 else []
+
+
+if __name__ == '__main__':
+    budget_ms = float(sys.argv[1]) if len(sys.argv) > 1 else 300
+
+    # 第一次运行用于预热.pyc缓存，不计入结果
+    measure()
+    results = [measure() for _ in range(RUNS)]
+    best = min(elapsed for elapsed, _ in results)
+    loaded = results[0][1]
+
+    print(f"导入main耗时: {best:.1f} ms (预算 {budget_ms:.0f} ms, {RUNS} 次取最小值)")
+    if loaded:
+        print(f"启动时加载了重依赖: {', '.join(loaded)}")
+    if best > budget_ms or loaded:
+        print("FAIL")
+        sys.exit(1)
+    print("OK")
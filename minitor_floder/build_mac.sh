@@ -3,6 +3,8 @@ echo "Cleaning previous builds..."
 rm -rf build dist
 echo "Installing requirements..."
 pip install -r requirements.txt
+echo "Checking startup time..."
+python bench_startup.py || exit 1
 echo "Building executable..."
 pyinstaller --clean game_monitor.spec
 echo "Build complete!"
\ No newline at end of file
@@ -3,6 +3,8 @@ echo Cleaning previous builds...
 rmdir /s /q build dist
 echo Installing requirements...
 pip install -r requirements.txt
+echo Checking startup time...
+python bench_startup.py || exit /b 1
 echo Building executable...
 pyinstaller --clean game_monitor.spec
 echo Build complete!
@@ -1,22 +1,79 @@
+# requests、bs4、pandas、schedule等较重的依赖在第一次用到时才导入，加快程序启动
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
-import requests
-from bs4 import BeautifulSoup
-import pandas as pd
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
+from email.utils import parsedate_to_datetime
+import xml.etree.ElementTree as ET
+import gzip
 import time
 import re
 import logging
-from urllib.parse import quote
+from urllib.parse import quote, urlsplit
 import random
 from threading import Thread
 import os
 import json
-import schedule
+import hashlib
+import heapq
+import math
 import threading
 import sys
-from openpyxl import load_workbook
-import xlrd
+
+# 历史数据的列类型：重复度高的列用category，时间用datetime64，文本用Arrow字符串（没有安装pyarrow时用普通string）
+TIMESTAMP_FORMAT = '%Y-%m-%d %H:%M:%S'
+HISTORY_SCHEMA = {
+    'title': 'string',
+    'url': 'string',
+    'game_name': 'string',
+    'site': 'category',
+    'time_range': 'category',
+    'timestamp': 'datetime64[ns]'
+}
+
+def _parse_timestamps(values, column):
+    """
+    解析时间列：先按程序写入的格式解析，不符合的（例如手工编辑过的）再按任意格式解析
+    仍有无法解析的值时保留原始文本，避免保存时把历史数据覆盖成空值
+    """
+    import pandas as pd
+    if pd.api.types.is_datetime64_any_dtype(values):
+        return values
+
+    parsed = pd.to_datetime(values, format=TIMESTAMP_FORMAT, errors='coerce')
+    failed = parsed.isna() & values.notna()
+    if failed.any():
+        try:
+            # 带时区的值统一转成UTC后去掉时区，才能和其他值放在同一列
+            fallback = pd.Series([pd.to_datetime(value, errors='coerce', utc=True) for value in values[failed]],
+                                 index=values[failed].index)
+            parsed[failed] = pd.to_datetime(fallback, utc=True).dt.tz_convert(None)
+        except (TypeError, ValueError):
+            parsed[failed] = pd.NaT
+        failed = parsed.isna() & values.notna()
+    if failed.any():
+        logging.warning(f"{failed.sum()} values in '{column}' could not be parsed as time "
+                        f"(e.g. {values[failed].iloc[0]!r}), keeping the column as text")
+        return values
+    return parsed
+
+def apply_history_schema(df):
+    """把历史数据转换为紧凑的列类型，读取和保存时共用"""
+    try:
+        import pyarrow  # noqa: F401
+        string_dtype = 'string[pyarrow]'
+    except ImportError:
+        string_dtype = 'string'
+
+    for column, dtype in HISTORY_SCHEMA.items():
+        if column not in df.columns:
+            continue
+        if dtype.startswith('datetime64'):
+            df[column] = _parse_timestamps(df[column], column)
+        elif dtype == 'string':
+            df[column] = df[column].astype(string_dtype)
+        else:
+            df[column] = df[column].astype(dtype)
+    return df
 
 class Config:
     def __init__(self, config_file="config.json"):
@@ -34,7 +91,9 @@ class Config:
             "time_range": "24h",
             "scheduler_enabled": False,
             "schedule_time": "09:00",
-            "use_existing_csv": False
+            "use_existing_csv": False,
+            "resume_enabled": False,
+            "sitemap_enabled": True
         }
         
         try:
@@ -67,6 +126,7 @@ class ScheduleManager:
         :param interval_hours: 间隔小时数
         :param run_immediately: 是否立即执行一次
         """
+        import schedule
         if self.running:
             return
             
@@ -86,6 +146,9 @@ class ScheduleManager:
 
     def stop(self):
         """停止定时任务"""
+        if not self.running:
+            return
+        import schedule
         self.running = False
         schedule.clear()
         if self.thread:
@@ -93,10 +156,546 @@ class ScheduleManager:
 
     def _run_schedule(self):
         """运行定时任务循环"""
+        import schedule
         while self.running:
             schedule.run_pending()
             time.sleep(30)  # 每30秒检查一次
 
+class RunJournal:
+    def __init__(self, journal_file="game_monitor_journal.jsonl"):
+        """
+        运行日志（断点续跑）
+        每个网站/时间范围完成后立即追加一行JSON，崩溃后可从中恢复
+        """
+        self.journal_file = journal_file
+
+    def load(self):
+        """读取已完成的记录，返回 {(site, time_range): results}"""
+        completed = {}
+        if not os.path.exists(self.journal_file):
+            return completed
+
+        with open(self.journal_file, 'r', encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    # 崩溃时最后一行可能只写了一半，直接忽略
+                    continue
+                completed[(entry['site'], entry['time_range'])] = entry.get('results', [])
+        return completed
+
+    def record(self, site, time_range, results):
+        """追加一条已完成记录并立即落盘"""
+        entry = {
+            'site': site,
+            'time_range': time_range,
+            'results': results
+        }
+        with open(self.journal_file, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+    def mark_saved(self, pairs):
+        """
+        结果已保存但还有未完成的网站时调用：已完成的网站只保留完成标记，不再保留结果，
+        断点续跑时跳过它们，也不会重复统计
+        """
+        tmp_file = self.journal_file + '.tmp'
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            for site, time_range in pairs:
+                f.write(json.dumps({'site': site, 'time_range': time_range, 'results': []}, ensure_ascii=False) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_file, self.journal_file)
+
+    def clear(self):
+        """结果保存成功后删除运行日志"""
+        if os.path.exists(self.journal_file):
+            os.remove(self.journal_file)
+
+class RateController:
+    def __init__(self, initial_rate=15, min_rate=1, max_rate=30, increase_step=1,
+                 decrease_factor=0.5, failure_threshold=5, cooldown=600):
+        """
+        全局请求速率控制（AIMD）和熔断
+        所有请求共用同一个实例：成功时线性提高速率，遇到429时成倍降低速率，
+        连续失败达到阈值后熔断，冷却期内不再发送请求
+        :param initial_rate: 初始速率（次/分钟）
+        :param min_rate: 最低速率（次/分钟）
+        :param max_rate: 最高速率（次/分钟）
+        :param increase_step: 每次成功后提高的速率（次/分钟）
+        :param decrease_factor: 遇到429时速率乘以的系数
+        :param failure_threshold: 触发熔断的连续失败次数
+        :param cooldown: 熔断后的冷却时间（秒）
+        """
+        self.rate = initial_rate
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.increase_step = increase_step
+        self.decrease_factor = decrease_factor
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.consecutive_failures = 0
+        self.open_until = 0
+        self.next_allowed = 0
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        """
+        等待下一个可用的请求时间
+        :return: 熔断打开时返回False，不应发送请求
+        """
+        with self.lock:
+            now = time.time()
+            if now < self.open_until:
+                return False
+            # 预留时间槽后在锁外等待，加一点随机抖动避免请求过于规律
+            interval = 60.0 / self.rate * random.uniform(0.8, 1.2)
+            start = max(now, self.next_allowed)
+            self.next_allowed = start + interval
+        time.sleep(max(0, start - now))
+        return True
+
+    def on_success(self):
+        """请求成功：线性提高速率，重置连续失败计数"""
+        with self.lock:
+            self.rate = min(self.max_rate, self.rate + self.increase_step)
+            self.consecutive_failures = 0
+
+    def on_rate_limited(self):
+        """遇到429：成倍降低速率，并推迟下一次请求"""
+        with self.lock:
+            self.rate = max(self.min_rate, self.rate * self.decrease_factor)
+            self.next_allowed = max(self.next_allowed, time.time() + 60.0 / self.rate)
+            self._record_failure()
+
+    def on_failure(self):
+        """请求异常（超时、连接失败等）：只计入连续失败次数"""
+        with self.lock:
+            self._record_failure()
+
+    def _record_failure(self):
+        self.consecutive_failures += 1
+        if self.consecutive_failures >= self.failure_threshold:
+            # 熔断，冷却结束后允许重新尝试一次，再失败立即重新熔断
+            self.open_until = time.time() + self.cooldown
+            self.consecutive_failures = self.failure_threshold - 1
+
+# 所有监控任务共用，定时任务每次新建GameSiteMonitor时也能保留速率状态
+rate_controller = RateController()
+
+class SitemapDiscovery:
+    # 没有在robots.txt中声明时依次尝试的地址
+    DEFAULT_PATHS = ['/sitemap.xml', '/sitemap_index.xml', '/feed', '/rss.xml', '/atom.xml']
+    TIME_RANGES = {'24h': timedelta(days=1), '1w': timedelta(weeks=1)}
+
+    def __init__(self, headers=None, proxies=None, state_file="sitemap_state.json",
+                 recheck_days=7, max_child_sitemaps=20, max_urls=1000):
+        """
+        通过sitemap.xml/RSS发现新页面，比Google site:搜索便宜得多
+        使用ETag/If-Modified-Since条件请求，边下载边解析，内存占用与sitemap大小无关
+        :param state_file: 保存各网站sitemap地址和缓存头的文件（只保存地址和缓存头，不保存页面）
+        :param recheck_days: 没有可用sitemap的网站多少天后重新探测
+        :param max_child_sitemaps: sitemap索引中最多读取的子sitemap数
+        :param max_urls: 每个网站每次最多返回的页面数
+        """
+        self.headers = headers or {}
+        self.proxies = proxies
+        self.state_file = state_file
+        self.recheck_seconds = recheck_days * 86400
+        self.max_child_sitemaps = max_child_sitemaps
+        self.max_urls = max_urls
+        try:
+            with open(self.state_file, 'r', encoding='utf-8') as f:
+                self.state = json.load(f)
+        except (OSError, ValueError):
+            self.state = {}
+        # 旧版本的状态文件里保存了页面列表，读取时去掉
+        for entry in self.state.values():
+            for validators in entry.get('ranges', {}).values():
+                validators.pop('pages', None)
+
+    def save(self):
+        """保存各网站的sitemap状态"""
+        tmp_file = self.state_file + '.tmp'
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump(self.state, f, ensure_ascii=False)
+        os.replace(tmp_file, self.state_file)
+
+    def discover(self, site, time_range):
+        """
+        获取网站在时间范围内更新的页面
+        :return: [(title, url, title_from_url), ...]；没有可用的sitemap时返回None，由Google搜索兜底
+        """
+        import requests
+        since = datetime.now(timezone.utc) - self.TIME_RANGES[time_range]
+        entry = self.state.get(site)
+
+        if entry is None or (entry['feed_url'] is None and time.time() - entry['checked'] > self.recheck_seconds):
+            # 探测时已经按当前时间范围下载过一次，直接使用探测的结果
+            entry, pages = self._probe(site, time_range, since)
+            self.state[site] = entry
+            return pages
+
+        if entry['feed_url'] is None:
+            return None
+
+        # 缓存头按时间范围分别保存：24h下载过不代表1w的页面也已经发现
+        # 304说明同一时间范围上次下载后没有变化，那时找到的页面已经在existing_urls里，返回空列表即可
+        ranges = entry.setdefault('ranges', {})
+        try:
+            ranges[time_range], pages = self._fetch(site, entry['feed_url'], since, ranges.get(time_range))
+        except (requests.exceptions.RequestException, ET.ParseError, OSError, EOFError):
+            # sitemap失效，下次重新探测
+            self.state[site] = {'feed_url': None, 'checked': 0}
+            return None
+        return pages
+
+    def _probe(self, site, time_range, since):
+        """查找网站可用的sitemap或RSS地址，返回 (状态, 时间范围内的页面)；没有可用的地址时页面为None"""
+        import requests
+        host = site.split('/')[0]
+        candidates = []
+        try:
+            response = requests.get(f"https://{host}/robots.txt", headers=self.headers,
+                                    proxies=self.proxies, timeout=15)
+            if response.status_code == 200:
+                for line in response.text.splitlines():
+                    if line.lower().startswith('sitemap:'):
+                        candidates.append(line.split(':', 1)[1].strip())
+        except requests.exceptions.RequestException:
+            pass
+        candidates += [f"https://{host}{path}" for path in self.DEFAULT_PATHS]
+
+        for feed_url in candidates:
+            try:
+                # 至少有一条带日期的记录才算可用
+                validators, pages = self._fetch(site, feed_url, since, require_dates=True)
+            except (requests.exceptions.RequestException, ET.ParseError, OSError, EOFError, ValueError):
+                continue
+            return {'feed_url': feed_url, 'checked': time.time(), 'ranges': {time_range: validators}}, pages
+        return {'feed_url': None, 'checked': time.time()}, None
+
+    def _fetch(self, site, feed_url, since, cached=None, require_dates=False):
+        """
+        下载并解析sitemap/RSS
+        :param cached: 同一时间范围上次的缓存头，有则发送条件请求
+        :return: ({'etag', 'last_modified'}, [(title, url, 标题是否由URL生成), ...])；304时页面为空
+        """
+        import requests
+        headers = dict(self.headers)
+        if cached:
+            if cached.get('etag'):
+                headers['If-None-Match'] = cached['etag']
+            if cached.get('last_modified'):
+                headers['If-Modified-Since'] = cached['last_modified']
+
+        with requests.get(feed_url, headers=headers, proxies=self.proxies,
+                          timeout=30, stream=True) as response:
+            if cached and response.status_code == 304:
+                # 没有变化，不需要下载
+                return cached, []
+            response.raise_for_status()
+            etag = response.headers.get('ETag')
+            last_modified = response.headers.get('Last-Modified')
+
+            pages = []
+            child_sitemaps = []
+            dated = 0
+            for kind, fields in self._iter_entries(response, feed_url):
+                if fields['date'] is not None:
+                    dated += 1
+                if kind == 'sitemap':
+                    if (fields['date'] is None or fields['date'] >= since) and len(child_sitemaps) < self.max_child_sitemaps:
+                        child_sitemaps.append(fields['url'])
+                    continue
+                if fields['date'] is None or fields['date'] < since or not self._belongs_to(fields['url'], site):
+                    continue
+                # 没有标题时才用URL生成，URL也看不出标题（纯数字、index等）的页面直接跳过
+                title = fields['title'] or self._title_from_url(fields['url'])
+                if not title:
+                    continue
+                pages.append((title, fields['url'], not fields['title']))
+                if len(pages) >= self.max_urls:
+                    break
+
+        if require_dates and not dated:
+            raise ValueError("sitemap has no dated entries")
+
+        # sitemap索引：只读取时间范围内更新过的子sitemap
+        for child_url in child_sitemaps:
+            if len(pages) >= self.max_urls:
+                break
+            pages += self._fetch(site, child_url, since)[1][:self.max_urls - len(pages)]
+        return {'etag': etag, 'last_modified': last_modified}, pages
+
+    def _iter_entries(self, response, feed_url):
+        """流式解析sitemap/RSS/Atom，逐条返回 (类型, 字段)，解析完的节点立即释放"""
+        response.raw.decode_content = True
+        stream = gzip.GzipFile(fileobj=response.raw) if feed_url.endswith('.gz') else response.raw
+
+        root = None
+        for event, elem in ET.iterparse(stream, events=('start', 'end')):
+            if root is None:
+                root = elem
+            if event != 'end':
+                continue
+            tag = self._local_name(elem.tag)
+            if tag not in ('url', 'sitemap', 'item', 'entry'):
+                continue
+
+            fields = {'url': None, 'title': None, 'date': None}
+            for child in elem.iter():
+                name = self._local_name(child.tag)
+                text = (child.text or '').strip()
+                if name == 'loc' and fields['url'] is None:
+                    fields['url'] = text
+                elif name == 'link' and fields['url'] is None:
+                    fields['url'] = text or child.get('href')
+                elif name == 'title' and text:
+                    fields['title'] = text
+                elif name in ('lastmod', 'pubDate', 'updated', 'published', 'publication_date') and fields['date'] is None:
+                    fields['date'] = self._parse_date(text)
+
+            elem.clear()
+            root.clear()
+            if fields['url']:
+                yield ('sitemap' if tag == 'sitemap' else 'page'), fields
+
+    @staticmethod
+    def _local_name(tag):
+        return tag.rsplit('}', 1)[-1] if isinstance(tag, str) else ''
+
+    @staticmethod
+    def _parse_date(text):
+        """解析W3C日期（sitemap/Atom）或RFC 822日期（RSS）"""
+        if not text:
+            return None
+        try:
+            date = datetime.fromisoformat(text.replace('Z', '+00:00'))
+        except ValueError:
+            try:
+                date = parsedate_to_datetime(text)
+            except (TypeError, ValueError):
+                return None
+        if date.tzinfo is None:
+            date = date.replace(tzinfo=timezone.utc)
+        return date
+
+    @staticmethod
+    def _belongs_to(url, site):
+        """判断页面是否属于该网站：去掉协议和www前缀后，要么等于site，要么在site后面紧跟 / ? #"""
+        url = url.split('://', 1)[-1].lower()
+        if url.startswith('www.'):
+            url = url[4:]
+        return url == site or (url.startswith(site) and url[len(site)] in '/?#')
+
+    # URL中不代表游戏名的常见片段
+    GENERIC_SLUG_WORDS = {'index', 'home', 'default', 'page', 'news', 'article', 'articles', 'post', 'posts',
+                          'detail', 'view', 'list', 'amp', 'feed', 'html', 'htm', 'php', 'aspx', 'p', 'id'}
+
+    @classmethod
+    def _title_from_url(cls, url):
+        """
+        sitemap没有标题时，用URL最后一段作为标题
+        只剩数字或通用词（如 12345、index、2024/10）时返回None
+        """
+        slug = urlsplit(url).path.rstrip('/').rsplit('/', 1)[-1]
+        slug = re.sub(r'\.\w+$', '', slug)
+        words = [word for word in re.split(r'[-_\s]+', slug) if word]
+        if not any(not word.isdigit() and word.lower() not in cls.GENERIC_SLUG_WORDS for word in words):
+            return None
+        return ' '.join(words)
+
+class SiteRegistry:
+    def __init__(self, sites_file, state_file=None):
+        """
+        网站列表注册表
+        对网站列表做规范化和去重，并通过文件mtime/哈希记录与上次运行相比的新增和删除
+        """
+        self.sites_file = sites_file
+        self.state_file = state_file or f"{sites_file}.registry.json"
+        self.sites = []
+        self.added = []
+        self.removed = []
+
+    @staticmethod
+    def normalize(site):
+        """规范化网站地址：去掉协议、www前缀、查询参数和结尾的斜杠，域名转小写"""
+        site = site.strip()
+        if not site or site.startswith('#'):
+            return ''
+        if '://' not in site:
+            site = 'http://' + site
+        parts = urlsplit(site)
+        host = parts.netloc.lower()
+        if host.startswith('www.'):
+            host = host[4:]
+        path = parts.path.rstrip('/')
+        return host + path
+
+    def _load_state(self):
+        """读取上次保存的状态"""
+        try:
+            with open(self.state_file, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+            # 网站列表以换行拼接的字符串保存，十万级网站时也比JSON数组紧凑
+            state['sites'] = state['sites'].split("\n") if state['sites'] else []
+            return state
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def _save_state(self, stat, digest, sites):
+        """保存当前状态"""
+        state = {
+            'mtime': stat.st_mtime,
+            'size': stat.st_size,
+            'sha1': digest,
+            'sites': "\n".join(sites)
+        }
+        try:
+            with open(self.state_file, 'w', encoding='utf-8') as f:
+                json.dump(state, f, ensure_ascii=False)
+        except OSError:
+            pass
+
+    def load(self):
+        """
+        加载网站列表，返回规范化去重后的列表，新增的网站排在最前面
+        文件未变化时直接复用上次的结果
+        """
+        stat = os.stat(self.sites_file)
+        state = self._load_state()
+
+        # mtime和大小都没变，不需要重新读取文件
+        if state and state['mtime'] == stat.st_mtime and state['size'] == stat.st_size:
+            self.sites = state['sites']
+            self.added, self.removed = [], []
+            return self.sites
+
+        with open(self.sites_file, 'rb') as f:
+            content = f.read()
+        digest = hashlib.sha1(content).hexdigest()
+
+        if state and state['sha1'] == digest:
+            # 文件只是被touch过，内容没变
+            sites = state['sites']
+            self.sites = sites
+            self.added, self.removed = [], []
+        else:
+            seen = set()
+            sites = []
+            for line in content.decode('utf-8-sig').splitlines():
+                site = self.normalize(line)
+                if site and site not in seen:
+                    seen.add(site)
+                    sites.append(site)
+
+            old_sites = set(state['sites']) if state else set()
+            self.added = [site for site in sites if site not in old_sites] if state else []
+            self.removed = [site for site in state['sites'] if site not in seen] if state else []
+
+            # 新增的网站优先抓取
+            added_set = set(self.added)
+            self.sites = self.added + [site for site in sites if site not in added_set]
+
+        self._save_state(stat, digest, sites)
+        return self.sites
+
+class TrendingGames:
+    def __init__(self, store_file="trending_games.json", half_life_hours=24, min_score=0.01):
+        """
+        热门游戏增量统计
+        每次运行只用新增结果更新各游戏的计数，分数按半衰期随时间衰减
+        :param store_file: 统计数据保存文件
+        :param half_life_hours: 分数衰减的半衰期（小时）
+        :param min_score: 保存时删除衰减后分数低于此值的游戏，避免文件无限增长
+        """
+        self.store_file = store_file
+        self.decay_rate = math.log(2) / (half_life_hours * 3600)
+        self.min_score = min_score
+        self.games = self._load()
+
+    def _load(self):
+        """读取统计数据，网站列表在内存中用set保存"""
+        try:
+            with open(self.store_file, 'r', encoding='utf-8') as f:
+                games = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        for game in games.values():
+            game['sites'] = set(game['sites'])
+        return games
+
+    def save(self, now=None):
+        """删除已经冷下来的游戏后保存，先写临时文件再替换，避免写到一半损坏"""
+        if now is None:
+            now = time.time()
+        self.games = {key: game for key, game in self.games.items()
+                      if self._decayed(game, now) >= self.min_score}
+        data = {key: {**game, 'sites': sorted(game['sites'])} for key, game in self.games.items()}
+        tmp_file = self.store_file + '.tmp'
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(tmp_file, self.store_file)
+
+    @staticmethod
+    def _key(game_name):
+        """游戏名称规范化，作为统计的键"""
+        return re.sub(r'\s+', ' ', str(game_name)).strip().lower()
+
+    def _decayed(self, game, now):
+        """计算当前时刻的衰减后分数"""
+        return game['score'] * math.exp(-self.decay_rate * (now - game['updated']))
+
+    def update(self, rows, now=None):
+        """
+        用新增结果更新统计
+        :param rows: 包含 game_name 和 site 的结果列表
+        """
+        if now is None:
+            now = time.time()
+        for row in rows:
+            game_name = row.get('game_name')
+            if not game_name:
+                continue
+            key = self._key(game_name)
+            game = self.games.get(key)
+            if game is None:
+                game = self.games[key] = {
+                    'name': game_name,
+                    'score': 0.0,
+                    'updated': now,
+                    'first_seen': now,
+                    'sites': set()
+                }
+            game['score'] = self._decayed(game, now) + 1
+            game['updated'] = now
+            site = row.get('site')
+            if site:
+                game['sites'].add(site)
+        self.save(now)
+
+    def top(self, k=10, now=None):
+        """返回当前最热门的k个游戏"""
+        if now is None:
+            now = time.time()
+        ranked = heapq.nlargest(
+            k, self.games.values(),
+            key=lambda game: self._decayed(game, now)
+        )
+        return [{
+            'game_name': game['name'],
+            'score': round(self._decayed(game, now), 3),
+            'site_count': len(game['sites']),
+            'first_seen': datetime.fromtimestamp(game['first_seen']).strftime('%Y-%m-%d %H:%M:%S')
+        } for game in ranked]
+
 class GameMonitorGUI:
     def __init__(self, root):
         self.root = root
@@ -227,6 +826,16 @@ class GameMonitorGUI:
         self.schedule_interval_entry.pack(side=tk.LEFT, padx=5)
         ttk.Label(schedule_frame, text="小时").pack(side=tk.LEFT)
 
+        # 断点续跑
+        resume_frame = ttk.Frame(main_frame)
+        resume_frame.pack(fill=tk.X, pady=5)
+        self.resume_enabled = tk.BooleanVar()
+        ttk.Checkbutton(resume_frame, text="断点续跑（跳过上次中断前已完成的网站）",
+                       variable=self.resume_enabled).pack(side=tk.LEFT)
+        self.sitemap_enabled = tk.BooleanVar()
+        ttk.Checkbutton(resume_frame, text="优先使用sitemap/RSS",
+                       variable=self.sitemap_enabled).pack(side=tk.LEFT, padx=5)
+
         # 时间范围选择
         time_frame = ttk.LabelFrame(main_frame, text="搜索时间范围", padding=5)
         time_frame.pack(fill=tk.X, pady=5)
@@ -267,6 +876,8 @@ class GameMonitorGUI:
         self.time_range.set(self.config.config["time_range"])
         self.scheduler_enabled.set(self.config.config["scheduler_enabled"])
         self.schedule_interval.set(self.config.config.get("schedule_interval", "24"))
+        self.resume_enabled.set(self.config.config["resume_enabled"])
+        self.sitemap_enabled.set(self.config.config["sitemap_enabled"])
         
         # 更新各个字段状态
         self.toggle_proxy_fields()
@@ -293,7 +904,9 @@ class GameMonitorGUI:
             "proxy_port": self.proxy_port.get(),
             "time_range": self.time_range.get(),
             "scheduler_enabled": self.scheduler_enabled.get(),
-            "schedule_interval": self.schedule_interval.get()
+            "schedule_interval": self.schedule_interval.get(),
+            "resume_enabled": self.resume_enabled.get(),
+            "sitemap_enabled": self.sitemap_enabled.get()
         })
         self.config.save_config()
 
@@ -421,7 +1034,9 @@ class GameMonitorGUI:
                 proxy_host=proxy_host,
                 proxy_port=proxy_port,
                 logger_callback=self.update_progress,
-                existing_csv=self.csv_path.get() if self.use_existing_csv.get() else None
+                existing_csv=self.csv_path.get() if self.use_existing_csv.get() else None,
+                resume=self.resume_enabled.get(),
+                use_sitemaps=self.sitemap_enabled.get()
             )
             
             results_df = monitor.monitor_all_sites([self.time_range.get()])
@@ -434,6 +1049,11 @@ class GameMonitorGUI:
                 self.update_progress("\n按时间范围统计:")
                 self.update_progress(str(results_df['time_range'].value_counts()))
                 
+                # 热门游戏（按衰减后的热度排序）
+                self.update_progress("\n热门游戏:")
+                for game in monitor.trending.top(10):
+                    self.update_progress(f"{game['game_name']}  网站数: {game['site_count']}  热度: {game['score']}  首次发现: {game['first_seen']}")
+                
                 # 显示保存位置
                 self.update_progress(f"\n结果已保存至: {os.path.abspath(monitor.last_output_file)}")
             else:
@@ -450,6 +1070,7 @@ class GameMonitorGUI:
             self.countdown_var.set("未启用定时任务")
             return
         
+        import schedule
         try:
             # 获取下一次执行的时间
             next_run = schedule.next_run()
@@ -469,13 +1090,18 @@ class GameMonitorGUI:
         self.countdown_timer = self.root.after(1000, self.update_countdown)
 
 class GameSiteMonitor:
-    def __init__(self, sites_file="game_sites.txt", proxy_host=None, proxy_port=None, logger_callback=None, existing_csv=None):
+    def __init__(self, sites_file="game_sites.txt", proxy_host=None, proxy_port=None, logger_callback=None, existing_csv=None,
+                 resume=False, journal_file="game_monitor_journal.jsonl", use_sitemaps=True):
         """
         初始化监控器
+        :param resume: 是否从运行日志中恢复上次中断的任务
+        :param journal_file: 运行日志文件路径
+        :param use_sitemaps: 是否优先通过sitemap/RSS发现新页面
         """
         self.setup_logging()
         
         self.sites_file = sites_file  # 保存文件路径而不是直接读取内容
+        self.site_registry = SiteRegistry(sites_file)
         self.headers = {
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
         }
@@ -493,12 +1119,20 @@ class GameSiteMonitor:
         self.existing_csv = existing_csv
         self.existing_urls = set()
         self.existing_df = None
+        self.history_load_failed = False
+        self.slug_title_urls = set()
+        self.resume = resume
+        self.journal = RunJournal(journal_file)
+        self.trending = TrendingGames()
+        self.rate_controller = rate_controller
+        self.sitemap_discovery = SitemapDiscovery(self.headers, self.proxies) if use_sitemaps else None
         
         if existing_csv and os.path.exists(existing_csv):
             self._load_existing_urls()
 
     def _load_existing_urls(self):
         """加载现有数据文件中的URL"""
+        import pandas as pd
         file_extension = os.path.splitext(self.existing_csv)[1].lower()
         
         try:
@@ -507,7 +1141,7 @@ class GameSiteMonitor:
                 encodings = ['utf-8-sig', 'utf-8', 'gbk', 'gb2312', 'gb18030']
                 for encoding in encodings:
                     try:
-                        self.existing_df = pd.read_csv(self.existing_csv, encoding=encoding)
+                        self.existing_df = apply_history_schema(pd.read_csv(self.existing_csv, encoding=encoding))
                         if 'url' in self.existing_df.columns:
                             self.existing_urls = set(self.existing_df['url'].tolist())
                             self.log_message(f"Successfully loaded CSV with encoding: {encoding}")
@@ -518,7 +1152,7 @@ class GameSiteMonitor:
                     
             elif file_extension == '.xlsx':
                 # 处理XLSX文件
-                self.existing_df = pd.read_excel(self.existing_csv, engine='openpyxl')
+                self.existing_df = apply_history_schema(pd.read_excel(self.existing_csv, engine='openpyxl'))
                 if 'url' in self.existing_df.columns:
                     self.existing_urls = set(self.existing_df['url'].tolist())
                     self.log_message("Successfully loaded XLSX file")
@@ -527,7 +1161,7 @@ class GameSiteMonitor:
                     
             elif file_extension == '.xls':
                 # 处理XLS文件
-                self.existing_df = pd.read_excel(self.existing_csv, engine='xlrd')
+                self.existing_df = apply_history_schema(pd.read_excel(self.existing_csv, engine='xlrd'))
                 if 'url' in self.existing_df.columns:
                     self.existing_urls = set(self.existing_df['url'].tolist())
                     self.log_message("Successfully loaded XLS file")
@@ -538,6 +1172,10 @@ class GameSiteMonitor:
             
         except Exception as e:
             self.log_message(f"Error loading file: {str(e)}")
+        
+        # 没能读取历史数据时不能再覆盖原文件，否则会丢失历史记录
+        self.existing_df = None
+        self.history_load_failed = True
 
     def setup_logging(self):
         """设置日志"""
@@ -554,9 +1192,10 @@ class GameSiteMonitor:
     def _load_sites(self):
         """加载网站列表"""
         try:
-            with open(self.sites_file, 'r', encoding='utf-8') as f:
-                sites = [line.strip() for line in f if line.strip()]
+            sites = self.site_registry.load()
             self.log_message(f"成功加载网站列表，共 {len(sites)} 个网站")
+            if self.site_registry.added or self.site_registry.removed:
+                self.log_message(f"与上次相比新增 {len(self.site_registry.added)} 个，删除 {len(self.site_registry.removed)} 个网站，新增网站优先抓取")
             return sites
         except FileNotFoundError:
             raise Exception(f"Sites file {self.sites_file} not found!")
@@ -594,6 +1233,7 @@ class GameSiteMonitor:
 
     def extract_search_results(self, html_content):
         """从Google搜索结果页面提取信息"""
+        from bs4 import BeautifulSoup
         soup = BeautifulSoup(html_content, 'html.parser')
         results = []
         
@@ -603,26 +1243,49 @@ class GameSiteMonitor:
                 url_elem = result.select_one('a')
                 
                 if title_elem and url_elem:
-                    title = title_elem.get_text()
-                    url = url_elem['href']
-                    
-                    # URL去重检查
-                    if url in self.existing_urls:
-                        continue
-                        
-                    game_name = self.extract_game_name(title)
-                    
-                    if game_name:
-                        results.append({
-                            'title': title,
-                            'url': url,
-                            'game_name': game_name
-                        })
+                    result = self.build_result(title_elem.get_text(), url_elem['href'])
+                    if result:
+                        results.append(result)
             except Exception as e:
                 self.log_message(f"Error extracting result: {str(e)}")
                 
         return results
 
+    def build_result(self, title, url):
+        """URL去重并提取游戏名称，Google搜索和sitemap共用"""
+        # URL去重检查
+        if url in self.existing_urls:
+            return None
+            
+        game_name = self.extract_game_name(title)
+        
+        if game_name:
+            return {
+                'title': title,
+                'url': url,
+                'game_name': game_name
+            }
+        return None
+
+    def discover_site(self, site, time_range):
+        """
+        发现网站的新页面：优先使用sitemap/RSS，没有可用sitemap时再用Google搜索
+        """
+        if self.sitemap_discovery:
+            pages = self.sitemap_discovery.discover(site, time_range)
+            if pages is not None:
+                results = []
+                for title, url, title_from_url in pages:
+                    result = self.build_result(title, url)
+                    if result:
+                        if title_from_url:
+                            # 由URL生成的标题不可靠，不参与标题去重
+                            self.slug_title_urls.add(url)
+                        results.append(result)
+                self.log_message(f"Found {len(results)} results for {site} from sitemap")
+                return results
+        return self.monitor_site(site, time_range)
+
     def extract_game_name(self, title):
         """从标题中提取游戏名称"""
         patterns = [
@@ -640,18 +1303,24 @@ class GameSiteMonitor:
         cleaned_title = re.sub(r'(攻略|评测|资讯|下载|官网|专区|合集|手游|网游|页游|主机游戏|单机游戏)', '', title)
         return cleaned_title.strip()
 
-    def monitor_site(self, site, time_range, max_retries=3, initial_delay=10):
+    def monitor_site(self, site, time_range, max_retries=3):
         """
         监控单个网站，添加重试机制
+        请求间隔和退避由全局的rate_controller统一控制
         :param site: 网站地址
         :param time_range: 时间范围
         :param max_retries: 最大重试次数
-        :param initial_delay: 初始等待时间（秒）
+        :return: 结果列表；熔断时返回None，表示本网站未完成
         """
+        import requests
         search_url = self.build_google_search_url(site, time_range)
         self.log_message(f"Monitoring {site} for {time_range} timeframe")
         
         for attempt in range(max_retries):
+            if not self.rate_controller.acquire():
+                self.log_message(f"Circuit breaker open, skipping {site}")
+                return None
+            
             try:
                 response = requests.get(
                     search_url, 
@@ -661,14 +1330,14 @@ class GameSiteMonitor:
                 )
                 
                 if response.status_code == 200:
+                    self.rate_controller.on_success()
                     results = self.extract_search_results(response.text)
                     self.log_message(f"Found {len(results)} results for {site}")
                     return results
                 elif response.status_code == 429:
-                    # 计算递增的等待时间
-                    wait_time = initial_delay * (2 ** attempt)  # 指数退避
-                    self.log_message(f"Rate limit hit for {site}, waiting {wait_time} seconds before retry {attempt + 1}/{max_retries}")
-                    time.sleep(wait_time)
+                    # 降低全局速率，下一次请求会自动等待
+                    self.rate_controller.on_rate_limited()
+                    self.log_message(f"Rate limit hit for {site}, rate lowered to {self.rate_controller.rate:.1f}/min, retry {attempt + 1}/{max_retries}")
                     
                     if attempt == max_retries - 1:
                         self.log_message(f"Max retries reached for {site} after 429 status")
@@ -682,19 +1351,19 @@ class GameSiteMonitor:
                 self.log_message(f"SSL Error for {site}: {str(e)}")
                 return []
             except requests.exceptions.RequestException as e:
+                self.rate_controller.on_failure()
                 if attempt == max_retries - 1:
                     self.log_message(f"Error monitoring {site} after {max_retries} retries: {str(e)}")
                     return []
                 
-                wait_time = initial_delay * (2 ** attempt)
-                self.log_message(f"Request failed for {site}, waiting {wait_time} seconds before retry {attempt + 1}/{max_retries}")
-                time.sleep(wait_time)
+                self.log_message(f"Request failed for {site}, retry {attempt + 1}/{max_retries}")
                 continue
         
         return []
 
     def monitor_all_sites(self, time_ranges=None):
         """监控所有网站"""
+        import pandas as pd
         if time_ranges is None:
             time_ranges = ['24h', '1w']
             
@@ -709,9 +1378,33 @@ class GameSiteMonitor:
         if self.existing_df is not None and 'title' in self.existing_df.columns:
             existing_titles = set(self.existing_df['title'].tolist())
         
+        # 断点续跑：读取运行日志，已完成的网站直接复用结果
+        completed = {}
+        if self.resume:
+            completed = self.journal.load()
+            if completed:
+                self.log_message(f"从运行日志恢复 {len(completed)} 个已完成的网站/时间范围")
+        else:
+            self.journal.clear()
+        
+        done_pairs = []
+        skipped_count = 0
+        
         for site in sites:
             for time_range in time_ranges:
-                results = self.monitor_site(site, time_range)
+                if (site, time_range) in completed:
+                    done_pairs.append((site, time_range))
+                    for result in completed[(site, time_range)]:
+                        self.existing_urls.add(result.get('url'))
+                        existing_titles.add(result.get('title'))
+                    all_results.extend(completed[(site, time_range)])
+                    continue
+                
+                results = self.discover_site(site, time_range)
+                if results is None:
+                    # 熔断未完成的网站不写入运行日志，断点续跑时会重新抓取
+                    skipped_count += 1
+                    continue
                 new_results = []
                 for result in results:
                     # URL去重检查
@@ -719,8 +1412,9 @@ class GameSiteMonitor:
                         duplicate_url_count += 1
                         continue
                     
-                    # Title去重检查
-                    if result.get('title') in existing_titles:
+                    # Title去重检查（标题由URL生成的页面不做标题去重）
+                    slug_title = result.get('url') in self.slug_title_urls
+                    if not slug_title and result.get('title') in existing_titles:
                         duplicate_title_count += 1
                         continue
                     
@@ -731,13 +1425,21 @@ class GameSiteMonitor:
                     })
                     new_results.append(result)
                     self.existing_urls.add(result.get('url'))
-                    existing_titles.add(result.get('title'))
+                    if not slug_title:
+                        existing_titles.add(result.get('title'))
                 
                 all_results.extend(new_results)
-                time.sleep(random.uniform(2, 5))
+                self.journal.record(site, time_range, new_results)
+                done_pairs.append((site, time_range))
+        
+        if skipped_count:
+            self.log_message(f"熔断期间跳过了 {skipped_count} 个网站/时间范围，已保留运行日志，可勾选断点续跑继续")
+        
+        if self.sitemap_discovery:
+            self.sitemap_discovery.save()
         
         if all_results:
-            new_df = pd.DataFrame(all_results)
+            new_df = apply_history_schema(pd.DataFrame(all_results))
             
             try:
                 if self.existing_df is not None:
@@ -751,7 +1453,7 @@ class GameSiteMonitor:
                     url_dedup_count = before_dedup - after_url_dedup
                     
                     # 再基于title去重
-                    df = df.drop_duplicates(subset=['title'], keep='last')
+                    df = self._drop_duplicate_titles(df)
                     after_title_dedup = len(df)
                     title_dedup_count = after_url_dedup - after_title_dedup
                     
@@ -772,7 +1474,7 @@ class GameSiteMonitor:
                     original_len = len(df)
                     df = df.drop_duplicates(subset=['url'], keep='last')
                     after_url_dedup = len(df)
-                    df = df.drop_duplicates(subset=['title'], keep='last')
+                    df = self._drop_duplicate_titles(df)
                     after_title_dedup = len(df)
                     
                     if original_len != after_title_dedup:
@@ -781,40 +1483,53 @@ class GameSiteMonitor:
                         self.log_message(f"URL去重后: {after_url_dedup}")
                         self.log_message(f"标题去重后: {after_title_dedup}")
                 
-                # 保存文件的代码保持不变...
-                if self.last_output_file:
+                # 合并后category列的类别可能不一致，统一转换一次
+                df = apply_history_schema(df)
+                
+                timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+                if self.last_output_file and not self.history_load_failed:
                     output_file = self.last_output_file
                     file_extension = os.path.splitext(output_file)[1].lower()
                 else:
-                    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+                    if self.history_load_failed:
+                        self.log_message(f"历史文件 {self.last_output_file} 读取失败，本次结果另存为新文件，不覆盖原文件")
                     output_file = f'game_monitor_results_{timestamp}.csv'
                     file_extension = '.csv'
                 
                 try:
                     if file_extension == '.csv':
                         encoding = getattr(self, 'file_encoding', 'gbk')
-                        df.to_csv(output_file, index=False, encoding=encoding)
+                        df.to_csv(output_file, index=False, encoding=encoding, date_format=TIMESTAMP_FORMAT)
                     elif file_extension == '.xlsx':
                         df.to_excel(output_file, index=False, engine='openpyxl')
                     elif file_extension == '.xls':
                         df.to_excel(output_file, index=False, engine='xlwt')
                     
                     self.log_message(f"\n结果已保存至: {output_file}")
-                    self.existing_df = df
-                    return df
+                    self.last_output_file = output_file
+                    self.history_load_failed = False
                     
                 except Exception as e:
                     self.log_message(f"Error saving results: {str(e)}")
                     backup_file = f'game_monitor_results_{timestamp}_backup.csv'
-                    df.to_csv(backup_file, index=False, encoding='utf-8-sig')
+                    df.to_csv(backup_file, index=False, encoding='utf-8-sig', date_format=TIMESTAMP_FORMAT)
                     self.log_message(f"Results saved with UTF-8-SIG encoding to {backup_file}")
-                    self.existing_df = df
-                    return df
+                
+                self.existing_df = df
                     
             except Exception as e:
                 self.log_message(f"Failed to save results: {str(e)}")
                 return df
+            
+            # 结果（或备份）保存成功后只更新一次热门游戏统计
+            try:
+                self.trending.update(all_results)
+            except Exception as e:
+                self.log_message(f"Error updating trending games: {str(e)}")
+            self._finish_journal(done_pairs, skipped_count)
+            return df
         else:
+            self._finish_journal(done_pairs, skipped_count)
             if duplicate_url_count > 0 or duplicate_title_count > 0:
                 self.log_message("\n=== 去重统计 ===")
                 if duplicate_url_count > 0:
@@ -826,6 +1541,19 @@ class GameSiteMonitor:
                 self.log_message("未找到任何结果")
             return pd.DataFrame()
 
+    def _drop_duplicate_titles(self, df):
+        """基于title去重，标题由URL生成的页面不参与"""
+        real_title = ~df['url'].isin(self.slug_title_urls)
+        duplicated = df[real_title].duplicated(subset=['title'], keep='last')
+        return df.drop(index=duplicated[duplicated].index)
+
+    def _finish_journal(self, done_pairs, skipped_count):
+        """结果保存后处理运行日志：全部完成时删除，有熔断跳过的网站时保留完成标记"""
+        if skipped_count:
+            self.journal.mark_saved(done_pairs)
+        else:
+            self.journal.clear()
+
 def main():
     root = tk.Tk()
     app = GameMonitorGUI(root)
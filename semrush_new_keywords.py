@@ -1,41 +1,226 @@
 #找到六个月内才有趋势的新词
 
+import csv
+import hashlib
+import heapq
+import os
+import time
+
 import pandas as pd
 import numpy as np
+from openpyxl import load_workbook
+
+CACHE_DIR = '.semrush_cache'
+
+def file_digest(file_path):
+    # 按块计算文件的sha1，作为缓存的键
+    h = hashlib.sha1()
+    with open(file_path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            h.update(block)
+    return h.hexdigest()
+
+def evict_cache(cache_dir=CACHE_DIR, max_bytes=1024 ** 3, max_age_days=30):
+    # 先删除超过max_age_days没用过的缓存，再按最近使用时间删除，直到总大小不超过max_bytes
+    entries = {}
+    for name in os.listdir(cache_dir):
+        path = os.path.join(cache_dir, name)
+        digest = name.split('.')[0]
+        stat = os.stat(path)
+        size, mtime = entries.get(digest, (0, 0))
+        entries[digest] = (size + stat.st_size, max(mtime, stat.st_mtime))
+
+    now = time.time()
+    total = sum(size for size, _ in entries.values())
+    for digest, (size, mtime) in sorted(entries.items(), key=lambda item: item[1][1]):
+        if now - mtime <= max_age_days * 86400 and total <= max_bytes:
+            break
+        for suffix in ('.npy', '.pkl'):
+            path = os.path.join(cache_dir, digest + suffix)
+            if os.path.exists(path):
+                os.remove(path)
+        total -= size
+
+def load_trends(file_path, cache_dir=CACHE_DIR):
+    # 读取导出文件并把Trend解析成12个月的矩阵，结果按文件哈希缓存
+    # 矩阵保存为.npy，再次读取时用mmap打开，不需要再读Excel和切分字符串
+    # 其余列（关键词等字符串）用pickle保存，无法mmap，读取时会整体加载
+    # 返回 (数据, 月份矩阵, 文件哈希, 是否命中缓存)
+    digest = file_digest(file_path)
+    matrix_file = os.path.join(cache_dir, digest + '.npy')
+    frame_file = os.path.join(cache_dir, digest + '.pkl')
+
+    if os.path.exists(matrix_file) and os.path.exists(frame_file):
+        try:
+            df = pd.read_pickle(frame_file)
+            months = np.load(matrix_file, mmap_mode='r')
+            if months.shape != (len(df), 12):
+                raise ValueError("cached matrix does not match cached frame")
+            # 更新修改时间，淘汰缓存时按最近使用排序
+            os.utime(matrix_file)
+            os.utime(frame_file)
+            return df, months, digest, True
+        except Exception as e:
+            # 缓存损坏（文件被截断、其他pandas版本写的pickle等）时删除后重新解析
+            print(f"缓存读取失败，重新解析: {e}")
+            for path in (matrix_file, frame_file):
+                if os.path.exists(path):
+                    os.remove(path)
 
-def analyze_trends(file_path):
-    # 读取Excel文件
     df = pd.read_excel(file_path)
+    months = df['Trend'].str.split(',', expand=True).astype(float).to_numpy()
+
+    os.makedirs(cache_dir, exist_ok=True)
+    np.save(matrix_file + '.tmp.npy', months)
+    os.replace(matrix_file + '.tmp.npy', matrix_file)
+    df.to_pickle(frame_file + '.tmp')
+    os.replace(frame_file + '.tmp', frame_file)
+    evict_cache(cache_dir)
+
+    return df, months, digest, False
+
+def analyze_trends(file_path, min_avg_second_half=0, use_cache=True, save_all=None):
+    # 读取Excel文件，将trend列分割成12个月的数据（使用缓存时直接读取解析好的矩阵）
+    # save_all: 是否保存完整的analyzed_keywords.xlsx；默认只在现有文件不是由同一个导出文件生成时保存，
+    # 同一个导出文件重复分析时跳过，否则写整个大表的耗时比读取还长
+    all_output = 'analyzed_keywords.xlsx'
+    digest_file = all_output + '.sha1'
+    if use_cache:
+        df, months, digest, _ = load_trends(file_path)
+    else:
+        df = pd.read_excel(file_path)
+        months = df['Trend'].str.split(',', expand=True).astype(float).to_numpy()
+        digest = None
+    if save_all is None:
+        # analyzed_keywords.xlsx旁边记录了生成它的导出文件哈希，不一致（或文件不存在）时重新保存
+        save_all = True
+        if digest and os.path.exists(all_output) and os.path.exists(digest_file):
+            with open(digest_file, 'r') as f:
+                save_all = f.read().strip() != digest
+    month_columns = ['month_' + str(i+1) for i in range(12)]
     
-    # 将trend列分割成12个月的数据
-    df[['month_' + str(i+1) for i in range(12)]] = df['Trend'].str.split(',', expand=True).astype(float)
-    
-    # 定义函数来判断是否为"新词"
-    def is_new_keyword(row):
-        first_half = row[['month_' + str(i+1) for i in range(6)]]
-        second_half = row[['month_' + str(i+1) for i in range(6, 12)]]
-        return (first_half.sum() == 0) and (second_half.sum() > 0)
-    
-    # 添加新列"is_new_keyword"
-    df['is_new_keyword'] = df.apply(is_new_keyword, axis=1)
+    # 判断是否为"新词"：前6个月没有搜索量，后6个月有搜索量
+    # 直接在（可能是mmap的）矩阵上计算，月份列只复制到需要输出的行
+    first_half = months[:, :6].sum(axis=1)
+    second_half = months[:, 6:]
+    df['is_new_keyword'] = (first_half == 0) & (second_half.sum(axis=1) > 0)
     
     # 计算后6个月的平均搜索量
-    df['avg_second_half'] = df[['month_' + str(i+1) for i in range(6, 12)]].mean(axis=1)
+    df['avg_second_half'] = second_half.mean(axis=1)
     
     # 对新词按后6个月平均搜索量排序
-    new_keywords = df[df['is_new_keyword']].sort_values('avg_second_half', ascending=False)
+    selected = (df['is_new_keyword'] & (df['avg_second_half'] >= min_avg_second_half)).to_numpy()
+    new_keywords = df[selected].copy()
+    new_keywords[month_columns] = np.asarray(months[selected])
+    new_keywords = new_keywords[list(df.columns[:-2]) + month_columns + ['is_new_keyword', 'avg_second_half']]
+    new_keywords = new_keywords.sort_values('avg_second_half', ascending=False)
     
-    # 保存结果
-    df.to_excel('analyzed_keywords.xlsx', index=False)
+    # 保存结果；只有保存完整结果时才把月份列加到全部数据上，返回的df在跳过保存时不含月份列
+    if save_all:
+        df[month_columns] = months
+        df = df[list(df.columns[:-14]) + month_columns + ['is_new_keyword', 'avg_second_half']]
+        df.to_excel(all_output, index=False)
+        if digest:
+            with open(digest_file, 'w') as f:
+                f.write(digest)
+        elif os.path.exists(digest_file):
+            os.remove(digest_file)
     new_keywords.to_excel('new_keywords.xlsx', index=False)
     
     return df, new_keywords
 
-# 使用函数
-file_path = 'Generator_broad-match_us_2024-09-16.xlsx'  # 替换为您的Excel文件路径
-all_data, new_words = analyze_trends(file_path)
+def iter_export_rows(file_path):
+    # 逐行读取导出文件，第一行是表头；xlsx用只读模式，不会把整个文件加载进内存
+    if file_path.lower().endswith('.csv'):
+        with open(file_path, newline='', encoding='utf-8-sig') as f:
+            yield from csv.reader(f)
+    else:
+        wb = load_workbook(file_path, read_only=True)
+        try:
+            yield from wb.active.iter_rows(values_only=True)
+        finally:
+            wb.close()
+
+def analyze_trends_streaming(file_path, top_n=1000, chunk_size=10000, output_file='new_keywords.xlsx'):
+    # 流式版本：按块读取和判断，只在堆里保留后6个月平均搜索量最高的top_n个新词
+    # 峰值内存只和chunk_size、top_n有关，和导出文件大小无关
+    rows = iter_export_rows(file_path)
+    header = list(next(rows))
+    trend_index = header.index('Trend')
+
+    heap = []  # (avg_second_half, 行号, 行数据)，最小堆
+    total = 0
+    new_count = 0
+
+    def process(chunk, start):
+        nonlocal new_count
+        # 把Trend字符串解析成12列的矩阵，格式不对的行跳过
+        parsed = []
+        for offset, row in enumerate(chunk):
+            # 被截断的行没有Trend列，跳过
+            if len(row) <= trend_index:
+                continue
+            values = str(row[trend_index]).split(',')
+            if len(values) == 12:
+                try:
+                    parsed.append((offset, [float(v) for v in values]))
+                except ValueError:
+                    continue
+        if not parsed:
+            return
+        months = np.array([values for _, values in parsed])
+        first_half = months[:, :6].sum(axis=1)
+        second_half = months[:, 6:]
+        is_new = (first_half == 0) & (second_half.sum(axis=1) > 0)
+        avg_second_half = second_half.mean(axis=1)
+
+        for i in np.flatnonzero(is_new):
+            new_count += 1
+            offset = parsed[i][0]
+            row = (list(chunk[offset]) + [None] * len(header))[:len(header)]
+            item = (float(avg_second_half[i]), start + offset, row + parsed[i][1])
+            if len(heap) < top_n:
+                heapq.heappush(heap, item)
+            elif item[0] > heap[0][0]:
+                heapq.heapreplace(heap, item)
+
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= chunk_size:
+            process(chunk, total)
+            total += len(chunk)
+            chunk = []
+    if chunk:
+        process(chunk, total)
+        total += len(chunk)
+
+    # 按后6个月平均搜索量排序输出
+    month_columns = ['month_' + str(i+1) for i in range(12)]
+    top = sorted(heap, key=lambda item: (-item[0], item[1]))
+    new_keywords = pd.DataFrame([item[2] for item in top], columns=header + month_columns)
+    if file_path.lower().endswith('.csv'):
+        # csv.reader读出来都是字符串，像read_csv一样把能转成数字的列转成数字
+        for column in header:
+            values = new_keywords[column].replace('', None)
+            try:
+                new_keywords[column] = pd.to_numeric(values)
+            except (ValueError, TypeError):
+                continue
+    new_keywords['is_new_keyword'] = True
+    new_keywords['avg_second_half'] = [item[0] for item in top]
+    new_keywords.to_excel(output_file, index=False)
+
+    return total, new_count, new_keywords
+
+if __name__ == '__main__':
+    # 使用函数
+    file_path = 'Generator_broad-match_us_2024-09-16.xlsx'  # 替换为您的Excel文件路径
+    all_data, new_words = analyze_trends(file_path)
+    # 导出文件很大时改用流式版本，只保留排名靠前的新词:
+    # total, new_count, new_words = analyze_trends_streaming(file_path, top_n=1000)
 
-print(f"总关键词数: {len(all_data)}")
-print(f"新词数量: {len(new_words)}")
-print("\n前10个新词:")
-print(new_words[['Keyword', 'avg_second_half']].head(10))  # 假设有一列名为'keyword'
+    print(f"总关键词数: {len(all_data)}")
+    print(f"新词数量: {len(new_words)}")
+    print("\n前10个新词:")
+    print(new_words[['Keyword', 'avg_second_half']].head(10))  # 假设有一列名为'keyword'